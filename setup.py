@@ -0,0 +1,34 @@
+"""Optional ahead-of-time compilation of the parser and renderer.
+
+Project metadata lives in pyproject.toml. This file only adds extension
+modules: when Cython is installed in the build environment, parser.py,
+nodes.py and renderer.py are compiled to C extensions that are imported in
+place of the .py sources. The hand-written _escape.c, a faster HTML escaper
+used by _escaping.py, is built whenever a C compiler is available. Without
+Cython, or if compilation fails, the package installs as pure Python. Set
+KIRO_PURE_PYTHON=1 to skip compilation.
+
+    pip install cython
+    pip install --no-build-isolation .
+"""
+import os
+
+from setuptools import Extension, setup
+
+ext_modules = []
+if not os.environ.get("KIRO_PURE_PYTHON"):
+    ext_modules.append(Extension("kiro_renderer._escape", ["src/kiro_renderer/_escape.c"], optional=True))
+    try:
+        from Cython.Build import cythonize
+    except ImportError:
+        pass
+    else:
+        cython_modules = cythonize(
+            ["src/kiro_renderer/parser.py", "src/kiro_renderer/nodes.py", "src/kiro_renderer/renderer.py"],
+            compiler_directives={"language_level": "3", "boundscheck": False},
+        )
+        for ext in cython_modules:
+            ext.optional = True # Fall back to the .py module if the C build fails
+        ext_modules.extend(cython_modules)
+
+setup(ext_modules=ext_modules)
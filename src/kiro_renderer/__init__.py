@@ -1,12 +1,53 @@
-from .parser import KiroParser
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TextIO, Tuple
+
+from .parser import KiroParser, _parse_inlines_cached
 from .renderer import KiroRenderer
 
-def render(text: str) -> str:
-    """The main entry point for rendering Kiro text to HTML."""
-    parser = KiroParser(text)
+# Rendered output of recent documents, keyed by a hash of the source text
+_RENDER_CACHE_SIZE = 128
+_RENDER_CACHE: "OrderedDict[bytes, Tuple[str, str]]" = OrderedDict()
+_RENDER_CACHE_LOCK = threading.Lock() # Guards _RENDER_CACHE; rendering itself runs unlocked
+
+def render(text: str) -> Tuple[str, str]:
+    """The main entry point for rendering Kiro text to HTML and CSS."""
+    # surrogatepass: text may hold lone surrogates, e.g. from surrogateescape decoding
+    key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    with _RENDER_CACHE_LOCK:
+        cached = _RENDER_CACHE.get(key)
+        if cached is not None:
+            _RENDER_CACHE.move_to_end(key)
+            return cached
+
+    parser = KiroParser(text, prerender=True)
     ast = parser.parse()
-    
+
     renderer = KiroRenderer()
     html_output = renderer.render(ast)
-    
+
+    with _RENDER_CACHE_LOCK:
+        _RENDER_CACHE[key] = html_output
+        while len(_RENDER_CACHE) > _RENDER_CACHE_SIZE:
+            _RENDER_CACHE.popitem(last=False)
     return html_output
+
+def render_to(text: str, out: TextIO) -> str:
+    """Renders Kiro text, writing the HTML to out block by block. Returns the CSS.
+
+    Each block is written as soon as it is parsed and is not kept afterwards,
+    so large documents never exist as a whole AST or HTML string. The output
+    is the same as render(), but it is not cached.
+    """
+    parser = KiroParser(text, prerender=True)
+    renderer = KiroRenderer()
+    return renderer.render_to(parser.document, parser.iter_blocks(), out.write)
+
+def _cache_clear():
+    """Drops all cached documents and inline parse results."""
+    with _RENDER_CACHE_LOCK:
+        _RENDER_CACHE.clear()
+    _parse_inlines_cached.cache_clear()
+
+render.cache_clear = _cache_clear
@@ -0,0 +1,149 @@
+/*
+ * Optional C implementation of HTML text escaping.
+ *
+ * escape_html(text) replaces '&', '<' and '>' with their entities, exactly
+ * like the pure Python escape_html_py in _escaping.py. Most text contains none
+ * of them, so the scan for the next special character is the hot loop. For
+ * one-byte (Latin-1/ASCII) strings it compares 16 characters at a time with
+ * SSE2 and copies the runs between specials with memcpy. Wider strings use a
+ * plain scalar scan. Text with nothing to escape is returned as is.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <string.h>
+
+#if defined(__SSE2__) || defined(_M_X64) || (defined(_M_IX86_FP) && _M_IX86_FP >= 2)
+#include <emmintrin.h>
+#define KIRO_HAVE_SSE2 1
+#endif
+
+static inline int
+is_special(Py_UCS4 ch)
+{
+    return ch == '&' || ch == '<' || ch == '>';
+}
+
+/* Returns the index of the next special character in a one-byte buffer at
+   or after start, or len if there is none. */
+static Py_ssize_t
+find_special_1byte(const Py_UCS1 *data, Py_ssize_t start, Py_ssize_t len)
+{
+    Py_ssize_t i = start;
+#ifdef KIRO_HAVE_SSE2
+    const __m128i amp = _mm_set1_epi8('&');
+    const __m128i lt = _mm_set1_epi8('<');
+    const __m128i gt = _mm_set1_epi8('>');
+    for (; i + 16 <= len; i += 16) {
+        __m128i chunk = _mm_loadu_si128((const __m128i *)(data + i));
+        __m128i hits = _mm_or_si128(
+            _mm_cmpeq_epi8(chunk, amp),
+            _mm_or_si128(_mm_cmpeq_epi8(chunk, lt), _mm_cmpeq_epi8(chunk, gt)));
+        int mask = _mm_movemask_epi8(hits);
+        if (mask != 0) {
+#if defined(__GNUC__) || defined(__clang__)
+            return i + __builtin_ctz((unsigned int)mask);
+#else
+            while (!(mask & 1)) {
+                mask >>= 1;
+                i++;
+            }
+            return i;
+#endif
+        }
+    }
+#endif
+    for (; i < len; i++) {
+        if (is_special(data[i])) {
+            return i;
+        }
+    }
+    return len;
+}
+
+static Py_ssize_t
+find_special(int kind, const void *data, Py_ssize_t start, Py_ssize_t len)
+{
+    if (kind == PyUnicode_1BYTE_KIND) {
+        return find_special_1byte((const Py_UCS1 *)data, start, len);
+    }
+    for (Py_ssize_t i = start; i < len; i++) {
+        if (is_special(PyUnicode_READ(kind, data, i))) {
+            return i;
+        }
+    }
+    return len;
+}
+
+static PyObject *
+escape_html(PyObject *module, PyObject *arg)
+{
+    if (!PyUnicode_Check(arg)) {
+        PyErr_Format(PyExc_TypeError, "escape_html() argument must be str, not %.200s",
+                     Py_TYPE(arg)->tp_name);
+        return NULL;
+    }
+#if PY_VERSION_HEX < 0x030C0000
+    if (PyUnicode_READY(arg) < 0) {
+        return NULL;
+    }
+#endif
+    Py_ssize_t len = PyUnicode_GET_LENGTH(arg);
+    int kind = PyUnicode_KIND(arg);
+    const void *data = PyUnicode_DATA(arg);
+
+    /* First pass: size the output. '&' grows by 4 characters, '<' and '>' by 3. */
+    Py_ssize_t extra = 0;
+    Py_ssize_t i = find_special(kind, data, 0, len);
+    if (i == len) {
+        return Py_NewRef(arg);
+    }
+    for (; i < len; i = find_special(kind, data, i + 1, len)) {
+        extra += PyUnicode_READ(kind, data, i) == '&' ? 4 : 3;
+    }
+
+    PyObject *result = PyUnicode_New(len + extra, PyUnicode_MAX_CHAR_VALUE(arg));
+    if (result == NULL) {
+        return NULL;
+    }
+    void *out = PyUnicode_DATA(result);
+
+    /* Second pass: copy each run verbatim, then write the entity for the special
+       character that ends it. The input and output have the same kind. */
+    Py_ssize_t pos = 0;
+    Py_ssize_t out_pos = 0;
+    while (pos < len) {
+        Py_ssize_t next = find_special(kind, data, pos, len);
+        memcpy((char *)out + out_pos * kind, (const char *)data + pos * kind, (size_t)(next - pos) * kind);
+        out_pos += next - pos;
+        if (next == len) {
+            break;
+        }
+        Py_UCS4 ch = PyUnicode_READ(kind, data, next);
+        const char *entity = ch == '&' ? "&amp;" : ch == '<' ? "&lt;" : "&gt;";
+        for (; *entity; entity++) {
+            PyUnicode_WRITE(kind, out, out_pos++, (Py_UCS4)*entity);
+        }
+        pos = next + 1;
+    }
+    return result;
+}
+
+static PyMethodDef escape_methods[] = {
+    {"escape_html", escape_html, METH_O,
+     "escape_html(text)\n--\n\nEscapes '&', '<' and '>' in text for use as HTML content."},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef escape_module = {
+    PyModuleDef_HEAD_INIT,
+    "kiro_renderer._escape",
+    "Optional C implementation of HTML text escaping.",
+    -1,
+    escape_methods,
+};
+
+PyMODINIT_FUNC
+PyInit__escape(void)
+{
+    return PyModule_Create(&escape_module);
+}
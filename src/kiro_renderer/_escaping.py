@@ -0,0 +1,28 @@
+"""HTML escaping shared by the nodes, the parser and the renderer."""
+
+def escape_html_py(text: str) -> str:
+    """Escapes text for use as HTML content."""
+    # str.replace scans in C and returns text itself when there is
+    # nothing to replace, which is much faster than str.translate with
+    # multi-character replacements. '&' must go first.
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+try:
+    # Optional C extension, see _escape.c. Same output as escape_html_py.
+    from ._escape import escape_html
+except ImportError:
+    escape_html = escape_html_py
+
+def escape_attr(value: str) -> str:
+    """Escapes a value for use inside a double-quoted HTML attribute."""
+    # Attribute values are always double-quoted, so quotes are escaped as well
+    value = escape_html(value)
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    return value
@@ -1,6 +1,6 @@
 import argparse
 import sys
-from kiro_renderer import render
+from kiro_renderer import render, render_to
 
 def main():
     parser = argparse.ArgumentParser(description="Render a .kiro file to HTML.")
@@ -12,21 +12,20 @@ def main():
     try:
         with open(args.input_file, 'r', encoding='utf-8') as f:
             kiro_text = f.read()
-        
-        html_output, css_output = render(kiro_text)
 
         if args.output:
             html_file_path = args.output
             css_file_path = html_file_path.replace(".html", ".css") # Assuming .html extension
 
             with open(html_file_path, 'w', encoding='utf-8') as f:
-                f.write(html_output)
+                css_output = render_to(kiro_text, f) # Streams the HTML into the file
             print(f"Successfully rendered HTML to {html_file_path}")
 
             with open(css_file_path, 'w', encoding='utf-8') as f:
                 f.write(css_output)
             print(f"Successfully generated CSS to {css_file_path}")
         else:
+            html_output, css_output = render(kiro_text)
             sys.stdout.buffer.write(html_output.encode('utf-8'))
 
     except FileNotFoundError:
@@ -1,138 +1,256 @@
 from dataclasses import dataclass, field
-from typing import List, Any, Optional, Dict
+from typing import List, Any, Optional, Dict, Iterable, Tuple
+
+from ._escaping import escape_html
 
 # --- Base Nodes ---
 
-@dataclass
 class Node:
     """The base class for all AST nodes."""
-    pass
+    __slots__ = ()
+    # The fields holding the child nodes rendered inside the node, in order.
+    # Leaves have none. This is a plain class attribute, not a dataclass field.
+    _render_fields = ()
 
-@dataclass
+@dataclass(slots=True)
 class StyleDefinition(Node):
     """Represents a parsed style definition from a <style> block."""
     name: str
     properties: Dict[str, str] = field(default_factory=dict) # e.g., {"color": "#444", "tailwind": "text-lg"}
     is_global: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class DocumentNode(Node):
     """The root node of the document's AST."""
+    _render_fields = ("children",)
     children: List[Node] = field(default_factory=list)
     styles: Dict[str, StyleDefinition] = field(default_factory=dict) # For storing parsed StyleDefinition objects
     footnotes: dict = field(default_factory=dict) # For storing footnote definitions
 
+    def flatten(self) -> "FlatNodes":
+        """Returns the document's blocks in flattened form (see FlatNodes)."""
+        return flatten_nodes(self.children)
+
 # --- Block Nodes ---
 
-@dataclass
+@dataclass(slots=True)
 class ParagraphNode(Node):
     """Represents a paragraph of text."""
+    _render_fields = ("children",)
     children: List[Node] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class HeadingNode(Node):
     """Represents a heading (e.g., # My Title)."""
+    _render_fields = ("children",)
     level: int
     children: List[Node] = field(default_factory=list)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class HorizontalRuleNode(Node):
-    """Represents a horizontal rule (---)."""
+    """Represents a horizontal rule (---). Frozen, so the parser can share one instance."""
     pass
 
-@dataclass
+@dataclass(slots=True)
 class CodeBlockNode(Node):
     """Represents a code block (```...```)."""
     language: Optional[str] = None
     content: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class QuoteNode(Node):
     """Represents a blockquote (| ...)."""
+    _render_fields = ("children",)
     children: List[Node] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class ListItemNode(Node):
     """Represents a standard list item (- or *)."""
+    _render_fields = ("children",)
     children: List[Node] = field(default_factory=list)
     level: int = 0 # For nested lists
 
-@dataclass
+@dataclass(slots=True)
 class OrderedListItemNode(Node):
     """Represents a report-style ordered list item (-1.A.)."""
+    _render_fields = ("children",)
     prefix: str # e.g., "1.", "A."
     children: List[Node] = field(default_factory=list)
     level: int = 0 # For nested lists
 
-@dataclass
+@dataclass(slots=True)
 class ToggleNode(Node):
     """Represents a toggle block (> ...)."""
+    _render_fields = ("summary", "content")
     summary: List[Node] = field(default_factory=list)
     content: List[Node] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class StyleBlockNode(Node):
     """Represents a <style> block. Its content is processed by the parser, not rendered directly."""
     content: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class FootnoteDefinitionNode(Node):
     """Represents a footnote definition ([^id]: ...)."""
+    _render_fields = () # Rendered in the footnote section, not in place
     id: str
     children: List[Node] = field(default_factory=list)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MacroNode(Node):
-    """Represents a macro (e.g., !youtube(...))."""
+    """Represents a macro (e.g., !youtube(...)). Frozen, so args_html always matches args."""
     name: str
-    args: List[str] = field(default_factory=list)
+    args: Tuple[str, ...] = ()
+    args_html: str = field(init=False, repr=False, compare=False) # args joined with ", " and HTML-escaped
+
+    def __post_init__(self):
+        # A list passed in is copied to a tuple, so it cannot be changed behind args_html
+        object.__setattr__(self, "args", tuple(self.args))
+        object.__setattr__(self, "args_html", escape_html(", ".join(self.args)))
+
+@dataclass(frozen=True, slots=True)
+class RawHtmlNode(Node):
+    """Represents a block the parser has already rendered to HTML (see KiroParser's prerender)."""
+    html: str
 
 # --- Inline Nodes ---
+# Inline nodes are frozen and hold their children in tuples: the parser caches
+# and shares them between documents, so they must never change.
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TextNode(Node):
     """Represents plain text content."""
     text: str
+    html: str = field(init=False, repr=False, compare=False) # text with HTML special characters escaped
 
-@dataclass
+    def __post_init__(self):
+        object.__setattr__(self, "html", escape_html(self.text))
+
+@dataclass(frozen=True, slots=True)
 class BoldNode(Node):
     """Represents bold text (**...**)."""
-    children: List[Node] = field(default_factory=list)
+    _render_fields = ("children",)
+    children: Tuple[Node, ...] = ()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class EmphasisNode(Node):
     """Represents emphasized (italic) text (*...*)."""
-    children: List[Node] = field(default_factory=list)
+    _render_fields = ("children",)
+    children: Tuple[Node, ...] = ()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StrikethroughNode(Node):
     """Represents strikethrough text (~~...~~)."""
-    children: List[Node] = field(default_factory=list)
+    _render_fields = ("children",)
+    children: Tuple[Node, ...] = ()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class InlineCodeNode(Node):
     """Represents inline code (`...`)."""
     text: str
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FootnoteRefNode(Node):
     """Represents a footnote reference ([^id])."""
     id: str
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StyleSpanNode(Node):
     """Represents a style span ([name]...<>)."""
+    _render_fields = ("children",)
     style_name: str
-    children: List[Node] = field(default_factory=list)
+    children: Tuple[Node, ...] = ()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ImageNode(Node):
     """Represents an image (@img: ...)."""
     src: str
     alt: Optional[str] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LinkNode(Node):
     """Represents a link (@link: ...)."""
     href: str
     text: Optional[str] = None
+
+# --- Flattened Form ---
+
+# Every node class, in a fixed order. A node's kind is its index here.
+NODE_KINDS = (
+    DocumentNode,
+    ParagraphNode,
+    HeadingNode,
+    HorizontalRuleNode,
+    CodeBlockNode,
+    QuoteNode,
+    ListItemNode,
+    OrderedListItemNode,
+    ToggleNode,
+    StyleBlockNode,
+    FootnoteDefinitionNode,
+    MacroNode,
+    RawHtmlNode,
+    TextNode,
+    BoldNode,
+    EmphasisNode,
+    StrikethroughNode,
+    InlineCodeNode,
+    FootnoteRefNode,
+    StyleSpanNode,
+    ImageNode,
+    LinkNode,
+)
+_KIND_INDEX = {node_class: kind for kind, node_class in enumerate(NODE_KINDS)}
+
+# The child fields of each kind, see Node._render_fields
+_KIND_FIELDS = tuple(node_class._render_fields for node_class in NODE_KINDS)
+
+# Event phases, in the low two bits of each FlatNodes code
+PHASE_OPEN = 0 # A leaf, or the start of a container
+PHASE_BETWEEN = 1 # Between two child fields of a container
+PHASE_CLOSE = 2 # The end of a container
+
+@dataclass(slots=True)
+class FlatNodes:
+    """A list of nodes flattened into parallel arrays, in document order.
+
+    Each leaf becomes one event. Each container becomes an opening event, the
+    events of its children, and a closing event, with a PHASE_BETWEEN event
+    between consecutive child fields (a toggle's summary and content).
+    codes[i] is the event's node kind shifted left by two bits, plus its
+    phase; nodes[i] is the node the event belongs to.
+    """
+    codes: List[int] = field(default_factory=list)
+    nodes: List[Node] = field(default_factory=list)
+
+def flatten_nodes(nodes: Iterable[Node]) -> FlatNodes:
+    """Flattens a list of nodes and their descendants, without recursion."""
+    flat = FlatNodes()
+    add_code = flat.codes.append
+    add_node = flat.nodes.append
+    # One entry per child field being walked: the iterator over the field, and
+    # the event that ends it (the between or closing event of its owner)
+    stack: List[Any] = [(iter(nodes), 0, None)]
+    while stack:
+        children, end_code, owner = stack[-1]
+        for node in children:
+            kind = _KIND_INDEX.get(type(node))
+            if kind is None:
+                raise ValueError(f"Unknown node type: {type(node)}")
+            code = kind << 2
+            add_code(code | PHASE_OPEN)
+            add_node(node)
+            fields = _KIND_FIELDS[kind]
+            if fields:
+                # Descend into the node's first field; the rest of children resumes afterwards
+                stack.append((iter(getattr(node, fields[-1])), code | PHASE_CLOSE, node))
+                for name in fields[-2::-1]:
+                    stack.append((iter(getattr(node, name)), code | PHASE_BETWEEN, node))
+                break
+        else:
+            stack.pop()
+            if owner is not None:
+                add_code(end_code)
+                add_node(owner)
+    return flat
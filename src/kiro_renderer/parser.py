@@ -1,5 +1,6 @@
+import functools
 import re
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 from .nodes import (
     DocumentNode,
@@ -23,314 +24,496 @@ from .nodes import (
     ImageNode,
     LinkNode,
     MacroNode,
+    RawHtmlNode,
     Node
 )
+from ._escaping import escape_html # Text is escaped once while parsing, as the renderer would
+
+# First characters that can start a block element. Lines whose first character
+# is neither in this set nor whitespace are plain paragraph text and never need
+# the regex below. Any Unicode whitespace can lead the \s* patterns.
+_BLOCK_LEAD_CHARS = frozenset('#-*+|>`[@!<')
+
+# Block-start patterns, in order of precedence. Each one is matched at the
+# start of a single line.
+_BLOCK_START_PATTERNS = (
+    ('style', r'\s*<style>\s*$'),
+    ('code', r'\s*```\S*\s*$'),
+    ('heading', r'#'),
+    ('hr', r'\s*---\s*$'),
+    ('quote', r'\|'),
+    ('toggle', r'>'),
+    ('list', r'[-*+]\s|-\d+\.(?:[A-Za-z]\.)*\s'),
+    ('footnote', r'\[\^[a-zA-Z0-9_\-]+\]:'),
+    ('image', r'@img:\s*\S+(?:\s*\(.*\))?$'),
+    ('link', r'@link:\s*\S+(?:\s*\(.*\))?$'),
+    ('macro', r'![a-zA-Z_][a-zA-Z0-9_]*\(.*\)$'),
+)
+
+# All block-start patterns combined into a single alternation. The name of the
+# matching group selects the block handler.
+_BLOCK_START_RE = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in _BLOCK_START_PATTERNS))
+
+# The first line that ends a paragraph: a blank line or any block start. It is
+# searched for across the whole text, so \s is narrowed to exclude newlines and
+# every match stays on one line. The groups are named as in _BLOCK_START_RE.
+_PARA_END_RE = re.compile(
+    r'^(?:[^\S\n]*$|' + '|'.join(f'(?P<{name}>{pattern})'.replace(r'\s', r'[^\S\n]') for name, pattern in _BLOCK_START_PATTERNS) + ')',
+    re.MULTILINE,
+)
+
+# Block patterns, matched with .match() so the leading ^ anchor is implicit
+_CODE_FENCE_RE = re.compile(r'```(\S*)$')
+_HEADING_RE = re.compile(r'(#+)\s*(.*)$')
+_LIST_RE = re.compile(r'[-*+]\s')
+_ORDERED_LIST_RE = re.compile(r'-(\d+\.)([A-Za-z]\.)*\s')
+_FOOTNOTE_DEF_RE = re.compile(r'\[\^([a-zA-Z0-9_\-]+)\]:\s*(.*)$')
+_IMG_RE = re.compile(r'@img:\s*(\S+)(?:\s*\((.*)\))?$')
+_LINK_RE = re.compile(r'@link:\s*(\S+)(?:\s*\((.*)\))?$')
+_MACRO_RE = re.compile(r'!([a-zA-Z_][a-zA-Z0-9_]*)\((.*)\)$')
+
+# Every line boundary str.splitlines() recognises other than '\n' and '\r\n'.
+# They are turned into '\n' so lines can be read from the text by offset.
+_LINE_BREAKS = ('\r', '\v', '\f', '\x1c', '\x1d', '\x1e', '\x85', '\u2028', '\u2029')
+
+# Inline patterns, matched with .match(text, pos) to avoid slicing the text
+_CODE_INLINE_RE = re.compile(r'`(.+?)`')
+_FOOTREF_RE = re.compile(r'\^\[([a-zA-Z0-9_\-]+)\]')
+_STYLESPAN_OPEN_RE = re.compile(r'\[([a-zA-Z0-9_\-]+)\]')
+# Run of characters that cannot start or end any inline element
+_PLAIN_RUN_RE = re.compile(r'[^\\*~`^\[<]*')
+
+# Inline node classes for each span marker. '<>' closes a style span.
+_SPAN_NODES = {
+    '**': BoldNode,
+    '*': EmphasisNode,
+    '~~': StrikethroughNode,
+    '<>': StyleSpanNode,
+}
+
+# Any character that can start inline markup. Text without them is plain.
+_INLINE_MARKUP_RE = re.compile(r'[*~`\[\^\\]')
+
+# Shared instances of immutable nodes that recur throughout a document
+_HR_SINGLETON = HorizontalRuleNode()
+_HR_HTML = RawHtmlNode(html='<hr>')
+_TEXT_INTERN = {} # Short text -> TextNode
+_TEXT_INTERN_MAX_LEN = 4
+_TEXT_INTERN_MAX_SIZE = 1024
 
 class KiroParser:
-    def __init__(self, text: str):
-        self.lines = text.splitlines()
+    def __init__(self, text: str, prerender: bool = False):
+        # With prerender, simple blocks with no inline markup are rendered to
+        # RawHtmlNode while parsing instead of being built as AST nodes
+        self.prerender = prerender
+        # Lines are read from the text by offset instead of splitting it into a list
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+        for line_break in _LINE_BREAKS:
+            if line_break in text:
+                text = text.replace(line_break, '\n')
+        self.text = text
         self.document = DocumentNode()
-        self.current_line_idx = 0
+        self._pos = 0 # Offset of the current line
+        self._line_end = self._find_line_end() # Offset of the newline ending it
+        self._block_start_at = (-1, None) # (offset, block type) of the last paragraph-ending line
+        self._block_handlers = {
+            'style': self._parse_style_block,
+            'code': self._parse_code_block,
+            'heading': self._parse_heading,
+            'hr': self._parse_horizontal_rule,
+            'quote': self._parse_quote_block,
+            'toggle': self._parse_toggle_block,
+            'list': self._parse_list_block,
+            'footnote': self._parse_footnote_definition,
+            'image': self._parse_image_block,
+            'link': self._parse_link_block,
+            'macro': self._parse_macro,
+        }
 
     def parse(self) -> DocumentNode:
-        """Parses the entire document text into an AST."""
-        while self.current_line_idx < len(self.lines):
-            line = self.lines[self.current_line_idx]
+        """Parses the entire document text into an AST.
+
+        Calling it again returns the same document: the text has already
+        been consumed, so no further blocks are added.
+        """
+        self.document.children.extend(self.iter_blocks())
+        return self.document
+
+    def iter_blocks(self) -> Iterator[Node]:
+        """Parses the document text, yielding each block node as soon as it is built.
+
+        Styles and footnote definitions are still recorded on self.document,
+        but the blocks are not kept in self.document.children, so a caller
+        can render them one at a time without holding the whole AST.
+        """
+        while self._has_line():
+            line = self._get_current_line()
 
             # Skip empty lines at the beginning of a block
             if not line.strip():
-                self.current_line_idx += 1
+                self._advance_line()
                 continue
 
-            # Try to parse block elements in order of precedence
-            if self._parse_style_block():
-                continue
-            if self._parse_code_block():
-                continue
-            if self._parse_heading():
-                continue
-            if self._parse_horizontal_rule():
-                continue
-            if self._parse_quote_block():
-                continue
-            if self._parse_toggle_block():
-                continue
-            if self._parse_list_block():
-                continue
-            if self._parse_footnote_definition():
-                continue
-            if self._parse_image_or_link_block():
-                continue
-            if self._parse_macro():
-                continue
+            # Dispatch to the block handler selected by the combined regex,
+            # or treat the line as the start of a paragraph
+            block_type = self._line_is_block_start(line)
+            if block_type is not None:
+                node = self._block_handlers[block_type]()
+            else:
+                node = self._parse_paragraph()
+            if node is not None:
+                yield node
 
-            # If no special block, treat as paragraph
-            self._parse_paragraph()
+    def _line_is_block_start(self, line: str) -> Optional[str]:
+        """Returns the block type starting at the current line, or None for paragraph text."""
+        # A paragraph that ended at this line has already classified it
+        offset, block_type = self._block_start_at
+        if offset == self._pos:
+            return block_type
+        lead = line[:1]
+        if lead not in _BLOCK_LEAD_CHARS and not lead.isspace():
+            return None
+        match = _BLOCK_START_RE.match(line)
+        return match.lastgroup if match else None
 
-        return self.document
+    def _find_line_end(self) -> int:
+        end = self.text.find('\n', self._pos)
+        return end if end != -1 else len(self.text)
+
+    def _has_line(self) -> bool:
+        return self._pos < len(self.text)
 
     def _get_current_line(self) -> str:
-        if self.current_line_idx < len(self.lines):
-            return self.lines[self.current_line_idx]
-        return ""
+        return self.text[self._pos:self._line_end]
 
     def _advance_line(self):
-        self.current_line_idx += 1
+        self._pos = self._line_end + 1
+        self._line_end = self._find_line_end()
 
-    def _parse_style_block(self) -> bool:
-        line = self._get_current_line()
-        if line.strip() == '<style>':
-            self._advance_line()
-            style_content_lines = []
-            while self.current_line_idx < len(self.lines):
-                current_line = self._get_current_line()
-                if re.match(r'^<>$', current_line.strip()): # Use regex for exact match
-                    self._advance_line()
-                    break
-                style_content_lines.append(current_line)
-                self._advance_line()
-            
-            self.document.styles['main'] = "\n".join(style_content_lines)
-            return True
-        return False
+    def _seek(self, pos: int):
+        self._pos = pos
+        self._line_end = self._find_line_end()
 
-    def _parse_code_block(self) -> bool:
-        line = self._get_current_line()
-        match = re.match(r'^```(\S*)$', line.strip())
-        if match:
+    # Block handlers. Each one is only called by iter_blocks() for a line that
+    # _BLOCK_START_RE has already classified, consumes the lines of its block
+    # and returns the block's node, or None if it does not produce one.
+
+    def _parse_style_block(self):
+        self._advance_line()
+        # The content lines are contiguous in the source, so the content is a single slice
+        content_start = content_end = self._pos
+        while self._has_line():
+            current_line = self._get_current_line()
+            if current_line.strip() == '<>':
+                self._advance_line()
+                break
+            content_end = self._line_end
             self._advance_line()
-            language = match.group(1) if match.group(1) else None
-            code_content_lines = []
-            while self.current_line_idx < len(self.lines):
-                current_line = self._get_current_line()
-                if current_line.strip() == '```':
-                    self._advance_line()
-                    break
-                code_content_lines.append(current_line)
+
+        self.document.styles['main'] = self.text[content_start:content_end]
+
+    def _parse_code_block(self):
+        match = _CODE_FENCE_RE.match(self._get_current_line().strip())
+        self._advance_line()
+        language = match.group(1) if match.group(1) else None
+        content_start = content_end = self._pos
+        while self._has_line():
+            current_line = self._get_current_line()
+            if current_line.strip() == '```':
                 self._advance_line()
-            self.document.children.append(CodeBlockNode(language=language, content="\n".join(code_content_lines)))
-            return True
-        return False
+                break
+            content_end = self._line_end
+            self._advance_line()
+        return CodeBlockNode(language=language, content=self.text[content_start:content_end])
 
-    def _parse_heading(self) -> bool:
-        line = self._get_current_line()
-        match = re.match(r'^(#+)\s*(.*)$', line)
-        if match:
-            level = len(match.group(1))
-            text_content = match.group(2).strip()
-            heading = HeadingNode(level=level)
-            heading.children.extend(self._parse_inlines(text_content)) # Apply inline parsing
-            self.document.children.append(heading)
+    def _parse_heading(self):
+        match = _HEADING_RE.match(self._get_current_line())
+        level = len(match.group(1))
+        text_content = match.group(2).strip()
+        if self.prerender and _INLINE_MARKUP_RE.search(text_content) is None:
+            html = f"<h{level}>{escape_html(text_content)}</h{level}>"
             self._advance_line()
-            return True
-        return False
+            return RawHtmlNode(html=html)
+        heading = HeadingNode(level=level)
+        heading.children.extend(_parse_inlines_cached(text_content)) # Apply inline parsing
+        self._advance_line()
+        return heading
 
-    def _parse_horizontal_rule(self) -> bool:
-        line = self._get_current_line()
-        if line.strip() == '---':
-            self.document.children.append(HorizontalRuleNode())
+    def _parse_horizontal_rule(self):
+        self._advance_line()
+        return _HR_HTML if self.prerender else _HR_SINGLETON
+
+    def _parse_quote_block(self):
+        text = self.text
+        quote_lines = []
+        while self._has_line() and text.startswith('|', self._pos):
+            quote_lines.append(text[self._pos + 1:self._line_end].strip())
             self._advance_line()
-            return True
-        return False
 
-    def _parse_quote_block(self) -> bool:
-        line = self._get_current_line()
-        if line.startswith('|'):
-            quote_lines = []
-            while self.current_line_idx < len(self.lines) and self._get_current_line().startswith('|'):
-                quote_lines.append(self._get_current_line()[1:].strip())
+        quote_node = QuoteNode()
+        # Recursively parse content within the quote block
+        # For simplicity, treating as a single paragraph for now, but can be extended.
+        paragraph = ParagraphNode()
+        paragraph.children.extend(_parse_inlines_cached(" ".join(quote_lines))) # Apply inline parsing
+        quote_node.children.append(paragraph)
+        return quote_node
+
+    def _parse_toggle_block(self):
+        summary_text = self._get_current_line()[1:].strip()
+        toggle_node = ToggleNode()
+        toggle_node.summary.extend(_parse_inlines_cached(summary_text)) # Apply inline parsing
+        self._advance_line()
+
+        text = self.text
+        content_lines = []
+        while self._has_line():
+            if text.startswith('>>', self._pos):
+                content_lines.append(text[self._pos + 2:self._line_end].strip())
                 self._advance_line()
-            
-            quote_node = QuoteNode()
-            # Recursively parse content within the quote block
-            # For simplicity, treating as a single paragraph for now, but can be extended.
-            paragraph = ParagraphNode()
-            paragraph.children.extend(self._parse_inlines(" ".join(quote_lines))) # Apply inline parsing
-            quote_node.children.append(paragraph)
-            self.document.children.append(quote_node)
-            return True
-        return False
+            elif not self._get_current_line().strip(): # Allow blank lines within toggle content
+                content_lines.append("")
+                self._advance_line()
+            else:
+                break
 
-    def _parse_toggle_block(self) -> bool:
-        line = self._get_current_line()
-        if line.startswith('>'):
-            summary_text = line[1:].strip()
-            toggle_node = ToggleNode()
-            toggle_node.summary.extend(self._parse_inlines(summary_text)) # Apply inline parsing
-            self._advance_line()
+        if content_lines:
+            paragraph = ParagraphNode()
+            paragraph.children.extend(_parse_inlines_cached(" ".join(content_lines))) # Apply inline parsing
+            toggle_node.content.append(paragraph)
 
-            content_lines = []
-            while self.current_line_idx < len(self.lines):
-                current_line = self._get_current_line()
-                if current_line.startswith('>>'):
-                    content_lines.append(current_line[2:].strip())
-                    self._advance_line()
-                elif not current_line.strip(): # Allow blank lines within toggle content
-                    content_lines.append("")
-                    self._advance_line()
-                else:
-                    break
-            
-            if content_lines:
-                paragraph = ParagraphNode()
-                paragraph.children.extend(self._parse_inlines(" ".join(content_lines))) # Apply inline parsing
-                toggle_node.content.append(paragraph)
-            
-            self.document.children.append(toggle_node)
-            return True
-        return False
+        return toggle_node
 
-    def _parse_list_block(self) -> bool:
+    def _parse_list_block(self):
         # This is a simplified placeholder. Full list parsing is complex.
         line = self._get_current_line()
-        if re.match(r'^[-*+]\s', line) or re.match(r'^-(\d+\.)([A-Za-z]\.)*\s', line):
-            list_item_text = line[line.find(' '):].strip()
-            list_item_node = ListItemNode() # Or OrderedListItemNode
-            paragraph = ParagraphNode()
-            paragraph.children.extend(self._parse_inlines(list_item_text)) # Apply inline parsing
-            list_item_node.children.append(paragraph)
-            self.document.children.append(list_item_node)
-            self._advance_line()
-            return True
-        return False
+        list_item_text = line[line.find(' '):].strip()
+        list_item_node = ListItemNode() # Or OrderedListItemNode
+        paragraph = ParagraphNode()
+        paragraph.children.extend(_parse_inlines_cached(list_item_text)) # Apply inline parsing
+        list_item_node.children.append(paragraph)
+        self._advance_line()
+        return list_item_node
 
-    def _parse_footnote_definition(self) -> bool:
-        line = self._get_current_line()
-        match = re.match(r'^\[\^([a-zA-Z0-9_\-]+)\]:\s*(.*)$', line)
-        if match:
-            footnote_id = match.group(1)
-            content_text = match.group(2).strip()
-            footnote_node = FootnoteDefinitionNode(id=footnote_id)
-            paragraph = ParagraphNode()
-            paragraph.children.extend(self._parse_inlines(content_text)) # Apply inline parsing
-            footnote_node.children.append(paragraph)
-            self.document.footnotes[footnote_id] = footnote_node
-            self.document.children.append(footnote_node) # Also add to children for rendering order
-            self._advance_line()
-            return True
-        return False
+    def _parse_footnote_definition(self):
+        match = _FOOTNOTE_DEF_RE.match(self._get_current_line())
+        footnote_id = match.group(1)
+        content_text = match.group(2).strip()
+        footnote_node = FootnoteDefinitionNode(id=footnote_id)
+        paragraph = ParagraphNode()
+        paragraph.children.extend(_parse_inlines_cached(content_text)) # Apply inline parsing
+        footnote_node.children.append(paragraph)
+        self.document.footnotes[footnote_id] = footnote_node
+        self._advance_line()
+        return footnote_node # Also a block, for rendering order
 
-    def _parse_image_or_link_block(self) -> bool:
-        line = self._get_current_line()
+    def _parse_image_block(self):
         # Image: @img: path/to/image.png (description)
-        img_match = re.match(r'^@img:\s*(\S+)(?:\s*\((.*)\))?$', line)
-        if img_match:
-            src = img_match.group(1)
-            alt = img_match.group(2) if img_match.group(2) else None
-            self.document.children.append(ImageNode(src=src, alt=alt))
-            self._advance_line()
-            return True
-        
+        img_match = _IMG_RE.match(self._get_current_line())
+        src = img_match.group(1)
+        alt = img_match.group(2) if img_match.group(2) else None
+        self._advance_line()
+        return ImageNode(src=src, alt=alt)
+
+    def _parse_link_block(self):
         # Link: @link: https://example.com (description)
-        link_match = re.match(r'^@link:\s*(\S+)(?:\s*\((.*)\))?$', line)
-        if link_match:
-            href = link_match.group(1)
-            text = link_match.group(2) if link_match.group(2) else None
-            self.document.children.append(LinkNode(href=href, text=text))
-            self._advance_line()
-            return True
-        return False
+        link_match = _LINK_RE.match(self._get_current_line())
+        href = link_match.group(1)
+        text = link_match.group(2) if link_match.group(2) else None
+        self._advance_line()
+        return LinkNode(href=href, text=text)
 
-    def _parse_macro(self) -> bool:
-        line = self._get_current_line()
+    def _parse_macro(self):
         # Macro: !macro_name(arg1, arg2, ...)
-        macro_match = re.match(r'^!([a-zA-Z_][a-zA-Z0-9_]*)\((.*)\)$', line)
-        if macro_match:
-            macro_name = macro_match.group(1)
-            args_str = macro_match.group(2)
-            args = [arg.strip() for arg in args_str.split(',')] if args_str else []
-            self.document.children.append(MacroNode(name=macro_name, args=args))
-            self._advance_line()
-            return True
-        return False
+        macro_match = _MACRO_RE.match(self._get_current_line())
+        macro_name = macro_match.group(1)
+        args_str = macro_match.group(2)
+        args = tuple(arg.strip() for arg in args_str.split(',')) if args_str else ()
+        self._advance_line()
+        return MacroNode(name=macro_name, args=args)
 
     def _parse_paragraph(self):
-        current_paragraph_lines = []
-        while self.current_line_idx < len(self.lines):
-            line = self._get_current_line()
-            # If it's an empty line or a new block element starts, end paragraph
-            if not line.strip() or \
-               re.match(r'^(#+)\s*(.*)$', line) or \
-               line.strip() == '---' or \
-               line.startswith('|') or \
-               line.startswith('>') or \
-               re.match(r'^```(\S*)$', line.strip()) or \
-               re.match(r'^[-*+]\s', line) or \
-               re.match(r'^-(\d+\.)([A-Za-z]\.)*\s', line) or \
-               re.match(r'^\[\^([a-zA-Z0-9_\-]+)\]:\s*(.*)$', line) or \
-               re.match(r'^@img:\s*(\S+)(?:\s*\((.*)\))?$', line) or \
-               re.match(r'^@link:\s*(\S+)(?:\s*\((.*)\))?$', line) or \
-               re.match(r'^!([a-zA-Z_][a-zA-Z0-9_]*)\((.*)\)$', line) or \
-               line.strip() == '<style>':
-                break
-            current_paragraph_lines.append(line)
-            self._advance_line()
-        
-        if current_paragraph_lines:
+        # The paragraph runs until the next line that is blank or starts a block.
+        # Its lines are contiguous in the source, so its text is one slice with
+        # the newlines turned into spaces.
+        paragraph_start = self._pos
+        match = _PARA_END_RE.search(self.text, self._line_end)
+        if match:
+            paragraph_end = match.start() - 1 # Drop the newline before the next block
+            self._block_start_at = (match.start(), match.lastgroup)
+            self._seek(match.start())
+        else:
+            paragraph_end = len(self.text)
+            self._seek(len(self.text))
+
+        if paragraph_end > paragraph_start:
+            text = self.text[paragraph_start:paragraph_end].replace('\n', ' ')
+            if self.prerender and _INLINE_MARKUP_RE.search(text) is None:
+                return RawHtmlNode(html=f"<p>{escape_html(text)}</p>")
             paragraph = ParagraphNode()
-            paragraph.children.extend(self._parse_inlines(" ".join(current_paragraph_lines))) # Apply inline parsing
-            self.document.children.append(paragraph)
-
-    def _parse_inlines(self, text: str) -> List[Node]:
-        nodes = []
-        i = 0
-        while i < len(text):
-            # Escape character
-            if text[i] == '\\':
-                if i + 1 < len(text):
-                    nodes.append(TextNode(text=text[i+1]))
-                    i += 2
-                    continue
-                else:
-                    nodes.append(TextNode(text='\\'))
-                    i += 1
-                    continue
+            paragraph.children.extend(_parse_inlines_cached(text)) # Apply inline parsing
+            return paragraph
+        return None
 
-            # Bold (**...**)
-            match = re.match(r'^\*\*(.+?)\*\*', text[i:])
-            if match:
-                nodes.append(BoldNode(children=self._parse_inlines(match.group(1))))
-                i += match.end()
-                continue
 
-            # Emphasis (*...*)
-            match = re.match(r'^\*(.+?)\*', text[i:])
-            if match:
-                nodes.append(EmphasisNode(children=self._parse_inlines(match.group(1))))
-                i += match.end()
-                continue
+@functools.lru_cache(maxsize=4096)
+def _parse_inlines_cached(text: str) -> Tuple[Node, ...]:
+    """Cached version of _parse_inlines. The inline nodes are frozen, so cached results are safe to share."""
+    return _parse_inlines(text)
+
+class _InlineFrame:
+    """An inline span that has been opened but not yet closed."""
+    __slots__ = ('marker', 'opener', 'style_name', 'parts', 'repeat')
+
+    def __init__(self, marker: str, opener: str = '', style_name: str = ''):
+        self.marker = marker # The closing marker, e.g. "**" or "<>"
+        self.opener = opener # The literal source text of the opening marker
+        self.style_name = style_name
+        self.parts = [] # Plain text strings and finished inline nodes, in order
+        # Number of spans opened back to back with this marker, as in "~~~~a~~".
+        # They are nested, and all but the innermost are still empty.
+        self.repeat = 1
+
+def _text_node(text: str) -> TextNode:
+    """Returns a TextNode for text, reusing one shared instance for short strings."""
+    if len(text) > _TEXT_INTERN_MAX_LEN:
+        return TextNode(text=text)
+    node = _TEXT_INTERN.get(text)
+    if node is None:
+        node = TextNode(text=text)
+        if len(_TEXT_INTERN) < _TEXT_INTERN_MAX_SIZE:
+            _TEXT_INTERN[text] = node
+    return node
+
+def _join_parts(parts: list) -> Tuple[Node, ...]:
+    """Turns a frame's parts into nodes, merging adjacent strings into one TextNode."""
+    nodes: List[Node] = []
+    append = nodes.append
+    plain: List[str] = []
+    for part in parts:
+        if type(part) is str:
+            plain.append(part)
+        else:
+            if plain:
+                append(_text_node("".join(plain)))
+                plain = []
+            append(part)
+    if plain:
+        append(_text_node("".join(plain)))
+    return tuple(nodes)
+
+def _parse_inlines(text: str) -> Tuple[Node, ...]:
+    """Parses inline markup in text into a tuple of inline nodes.
 
-            # Strikethrough (~~...~~)
-            match = re.match(r'^~~(.+?)~~', text[i:])
+    The text is scanned once, left to right. An opening marker pushes a frame
+    onto a stack and the next matching marker pops it into a node. Frames left
+    open in between, or at the end of the text, are kept as literal text.
+    """
+    # Most text has no markup at all and is a single text node
+    if _INLINE_MARKUP_RE.search(text) is None:
+        return (_text_node(text),) if text else ()
+
+    stack: List[_InlineFrame] = [_InlineFrame('')]
+    append = stack[-1].parts.append # Rebound whenever the top of the stack changes
+    length: int = len(text)
+    i: int = 0
+    while i < length:
+        char: str = text[i]
+
+        # Escape character
+        if char == '\\':
+            append(text[i+1] if i + 1 < length else '\\')
+            i += 2
+            continue
+
+        # Inline Code (`...`) and Footnote Reference (^[id]) contain no nested markup
+        if char == '`':
+            match = _CODE_INLINE_RE.match(text, i)
             if match:
-                nodes.append(StrikethroughNode(children=self._parse_inlines(match.group(1))))
-                i += match.end()
+                append(InlineCodeNode(text=match.group(1)))
+                i = match.end()
                 continue
-
-            # Inline Code (`...`)
-            match = re.match(r'^`(.+?)`', text[i:])
+        elif char == '^':
+            match = _FOOTREF_RE.match(text, i)
             if match:
-                nodes.append(InlineCodeNode(text=match.group(1)))
-                i += match.end()
+                append(FootnoteRefNode(id=match.group(1)))
+                i = match.end()
                 continue
 
-            # Footnote Reference ([^id])
-            match = re.match(r'^\^\[([a-zA-Z0-9_\-]+)\]', text[i:])
-            if match:
-                nodes.append(FootnoteRefNode(id=match.group(1)))
-                i += match.end()
+        # Bold (**...**), Emphasis (*...*), Strikethrough (~~...~~) and the end of a Style Span (<>)
+        marker = None
+        if char == '*':
+            marker = '**' if text.startswith('**', i) else '*'
+        elif char == '~' or char == '<':
+            marker = text[i:i+2]
+        if marker in _SPAN_NODES:
+            if _close_frame(stack, marker):
+                append = stack[-1].parts.append
+                i += len(marker)
+                continue
+            if marker == '**' and (i + 2 == length or text[i+2].isspace()) and _close_frame(stack, '*'):
+                # A "**" that cannot open a span ends an emphasis with its first star, as in "*a**"
+                append = stack[-1].parts.append
+                i += 1
+                continue
+            if marker != '<>':
+                top = stack[-1]
+                if top.marker == marker:
+                    top.repeat += 1 # The top span is still empty, see _close_frame
+                else:
+                    stack.append(_InlineFrame(marker, opener=marker))
+                    append = stack[-1].parts.append
+                i += len(marker)
                 continue
 
-            # Style Span ([name]...<>)
-            match = re.match(r'^\[([a-zA-Z0-9_\-]+)\](.+?)<>', text[i:])
+        # Style Span ([name]...<>). Style spans do not nest.
+        if char == '[' and not any(frame.marker == '<>' for frame in stack):
+            match = _STYLESPAN_OPEN_RE.match(text, i)
             if match:
-                style_name = match.group(1)
-                content = match.group(2)
-                nodes.append(StyleSpanNode(style_name=style_name, children=self._parse_inlines(content)))
-                i += match.end()
+                stack.append(_InlineFrame('<>', opener=match.group(0), style_name=match.group(1)))
+                append = stack[-1].parts.append
+                i = match.end()
                 continue
 
-            # If no match, just add the character as a TextNode
-            nodes.append(TextNode(text=text[i]))
-            i += 1
-        return nodes
+        # If no markup starts here, add this character and the plain text after it
+        end = _PLAIN_RUN_RE.match(text, i + 1).end()
+        append(text[i:end])
+        i = end
+
+    # Spans that were never closed are literal text
+    _unwind_frames(stack, 0)
+    return _join_parts(stack[0].parts)
+
+def _close_frame(stack: List[_InlineFrame], marker: str) -> bool:
+    """Closes the innermost open frame for marker, if there is one with content."""
+    for idx in range(len(stack) - 1, 0, -1):
+        if stack[idx].marker == marker:
+            break
+    else:
+        return False
+    if not stack[idx].parts and idx == len(stack) - 1:
+        return False # Empty spans like "****" stay literal
+
+    _unwind_frames(stack, idx)
+    frame = stack[-1]
+    node_class = _SPAN_NODES[marker]
+    if node_class is StyleSpanNode:
+        node = StyleSpanNode(style_name=frame.style_name, children=_join_parts(frame.parts))
+    else:
+        node = node_class(children=_join_parts(frame.parts))
+    if frame.repeat > 1:
+        # The span that encloses this one is now the innermost
+        frame.repeat -= 1
+        frame.parts = [node]
+    else:
+        stack.pop()
+        stack[-1].parts.append(node)
+    return True
+
+def _unwind_frames(stack: List[_InlineFrame], depth: int):
+    """Pops the frames above stack[depth] and gives their openers and content back to it as literal text."""
+    parts = stack[depth].parts
+    for frame in stack[depth + 1:]:
+        parts.append(frame.opener * frame.repeat)
+        parts.extend(frame.parts)
+    del stack[depth + 1:]
@@ -1,5 +1,7 @@
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Any, Tuple
+from operator import attrgetter
+from typing import List, Any, Callable, Iterable, Optional, Tuple
 
 from .nodes import (
     DocumentNode,
@@ -23,51 +25,177 @@ from .nodes import (
     ImageNode,
     LinkNode,
     MacroNode,
+    RawHtmlNode,
     Node,
-    StyleDefinition
+    StyleDefinition,
+    FlatNodes,
+    NODE_KINDS,
+    PHASE_OPEN,
+    PHASE_BETWEEN,
+    PHASE_CLOSE,
 )
+from ._escaping import escape_attr, escape_html
 
-class KiroRenderer:
-    def render(self, ast: DocumentNode) -> Tuple[str, str]:
-        """Renders the given AST into an HTML string and a CSS string."""
-        html_body_parts = []
-        
-        for child in ast.children:
-            html_body_parts.append(self._render_node(child))
-        
-        # Render footnotes at the end
-        if ast.footnotes:
-            html_body_parts.append("<section class=\"kiro-footnotes\">\n")
-            html_body_parts.append("<h2>Footnotes</h2>\n")
-            html_body_parts.append("<ol>\n")
-            # Sort by ID for consistent output, assuming IDs are sortable (e.g., numerical)
-            sorted_footnote_ids = sorted(ast.footnotes.keys(), key=lambda x: int(x) if x.isdigit() else x)
-            for footnote_id in sorted_footnote_ids:
-                footnote_node = ast.footnotes[footnote_id]
-                html_body_parts.append(f"<li id=\"fn-{footnote_id}\">")
-                html_body_parts.append(self._render_children(footnote_node.children))
-                html_body_parts.append(f" <a href=\"#fnref-{footnote_id}\" class=\"kiro-footnote-backref\">↩</a>")
-                html_body_parts.append("</li>\n")
-            html_body_parts.append("</ol>\n")
-            html_body_parts.append("</section>\n")
-
-        html_body_content = "".join(html_body_parts)
-        css_content = self._generate_css(ast.styles)
-
-        full_html = f"""<!DOCTYPE html>
-<html lang=\"en\">
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
 <head>
-    <meta charset=\"UTF-8\">
-    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Kiro Document</title>
-    <link rel=\"stylesheet\" href=\"output.css\">
+    <link rel="stylesheet" href="output.css">
 </head>
 <body>
-{html_body_content}
+"""
+_HTML_TAIL = """
 </body>
 </html>"""
 
-        return full_html, css_content
+
+class _Markup(str):
+    """Already rendered markup waiting on the _render_into stack.
+
+    Nodes on the stack are told apart from the markup of open containers by
+    type, so a stray str child still fails as an unknown node type.
+    """
+    __slots__ = ()
+
+# Opening and closing tags of containers whose markup does not depend on their fields
+_CONTAINER_TAGS = {
+    ParagraphNode: ("<p>", "</p>"),
+    QuoteNode: ("<blockquote>", "</blockquote>"),
+    # List items are rendered flat for now: full list parsing is not implemented
+    ListItemNode: ("<li>", "</li>"),
+    BoldNode: ("<strong>", "</strong>"),
+    EmphasisNode: ("<em>", "</em>"),
+    StrikethroughNode: ("<s>", "</s>"),
+}
+_LI_CLOSE = "</li>"
+_SPAN_CLOSE = "</span>"
+_PRE_OPEN = "<pre><code>"
+_PRE_CLOSE = "</code></pre>"
+_TOGGLE_OPEN = "<details><summary>"
+_TOGGLE_MIDDLE = "</summary><div>"
+_TOGGLE_CLOSE = "</div></details>"
+
+# Heading tags by level, index 0 unused
+_H_OPEN = (None,) + tuple(f"<h{level}>" for level in range(1, 7))
+_H_CLOSE = (None,) + tuple(f"</h{level}>" for level in range(1, 7))
+_HR = "<hr>"
+_FOOTNOTES_OPEN = '<section class="kiro-footnotes">\n<h2>Footnotes</h2>\n<ol>\n'
+_FOOTNOTES_CLOSE = "</ol>\n</section>\n"
+
+# Number of compiled renderers kept by each KiroRenderer, see compile_flat
+_COMPILED_CACHE_SIZE = 16
+
+def _fn_key(footnote_id: str) -> Tuple[int, Any]:
+    """Sort key for footnote IDs. Mixed numeric and named IDs never compare an int with a str."""
+    return (0, int(footnote_id)) if footnote_id.isdecimal() else (1, footnote_id)
+
+def _as_markup(emit: Any) -> Any:
+    """Wraps fixed markup from the emitter table as _Markup, leaving handlers and None as they are."""
+    return _Markup(emit) if type(emit) is str else emit
+
+class KiroRenderer:
+    def __init__(self):
+        # What each node class emits: a leaf has one entry, a container has its
+        # opening and closing markup, and a toggle also has the markup between
+        # its summary and content. Each entry is either a fixed string or a
+        # handler that returns the HTML for the node, built with an f-string.
+        emitters = {
+            DocumentNode: ("", ""),
+            HeadingNode: (self._render_heading_open, self._render_heading_close),
+            HorizontalRuleNode: (_HR,),
+            TextNode: (attrgetter("html"),), # Escaped when the node is built
+            CodeBlockNode: (self._render_code_block,),
+            OrderedListItemNode: (self._render_ordered_list_item, _LI_CLOSE),
+            ToggleNode: (_TOGGLE_OPEN, _TOGGLE_MIDDLE, _TOGGLE_CLOSE),
+            FootnoteDefinitionNode: ("",), # Rendered at the end of the document
+            StyleBlockNode: ("",), # Handled at the document level
+            InlineCodeNode: (self._render_inline_code,),
+            FootnoteRefNode: (self._render_footnote_ref,),
+            StyleSpanNode: (self._render_style_span, _SPAN_CLOSE),
+            ImageNode: (self._render_image,),
+            LinkNode: (self._render_link,),
+            MacroNode: (self._render_macro,),
+            RawHtmlNode: (attrgetter("html"),),
+            **_CONTAINER_TAGS,
+        }
+        # _specs is for walking the tree: (open, None) for a leaf class and
+        # (open, (fields, close, between)) for a container, with close and
+        # between as _Markup when fixed. _emitters is for FlatNodes, indexed
+        # by event code (node kind << 2 | phase).
+        self._specs = {}
+        self._emitters: List[Any] = [None] * (len(NODE_KINDS) << 2)
+        for kind, node_class in enumerate(NODE_KINDS):
+            entry = emitters[node_class]
+            fields = node_class._render_fields
+            between = entry[1] if len(entry) == 3 else None
+            container = (fields, _as_markup(entry[-1]), _as_markup(between)) if fields else None
+            self._specs[node_class] = (entry[0], container)
+            code = kind << 2
+            self._emitters[code | PHASE_OPEN] = entry[0]
+            if fields:
+                self._emitters[code | PHASE_BETWEEN] = between
+                self._emitters[code | PHASE_CLOSE] = entry[-1]
+        # Generated render functions by the event codes they were compiled for
+        self._compiled: "OrderedDict[Tuple[int, ...], Callable[[List[Node]], Tuple[str, ...]]]" = OrderedDict()
+
+    def render(self, ast: DocumentNode, flat: Optional[FlatNodes] = None) -> Tuple[str, str]:
+        """Renders the given AST into an HTML string and a CSS string.
+
+        flat may be ast.flatten(), computed earlier. Rendering from the
+        flattened form is faster than walking the tree, so a caller that
+        renders the same document repeatedly can flatten it once.
+        It must be flattened again after the blocks change. If compile_flat()
+        was called for a document with the same structure, the compiled
+        function is used.
+        """
+        html_parts = [_HTML_HEAD]
+        if flat is not None:
+            compiled = self._compiled.get(tuple(flat.codes)) if self._compiled else None
+            if compiled is not None:
+                html_parts.extend(compiled(flat.nodes))
+            else:
+                self._render_flat(flat, html_parts)
+        else:
+            self._render_into(ast.children, html_parts)
+        self._render_footnotes(ast, html_parts)
+        html_parts.append(_HTML_TAIL)
+        return "".join(html_parts), self._generate_css(ast.styles)
+
+    def render_to(self, ast: DocumentNode, blocks: Iterable[Node], write: Callable[[str], Any]) -> str:
+        """Renders blocks as they arrive, passing the HTML to write piece by piece.
+
+        blocks may be a generator such as KiroParser.iter_blocks(). The
+        footnotes and styles of ast are only read after the last block, so
+        the CSS is returned at the end rather than written.
+        """
+        write(_HTML_HEAD)
+        for child in blocks:
+            block_parts = []
+            self._render_into((child,), block_parts)
+            write("".join(block_parts))
+
+        html_parts = []
+        self._render_footnotes(ast, html_parts)
+        html_parts.append(_HTML_TAIL)
+        write("".join(html_parts))
+        return self._generate_css(ast.styles)
+
+    def _render_footnotes(self, ast: DocumentNode, out: List[str]):
+        """Renders the footnote section that ends the document, if it has footnotes."""
+        if not ast.footnotes:
+            return
+        out.append(_FOOTNOTES_OPEN)
+        # Sort by ID for consistent output: numeric IDs in numeric order, then the rest
+        sorted_footnote_ids = sorted(ast.footnotes, key=_fn_key)
+        for footnote_id in sorted_footnote_ids:
+            footnote_node = ast.footnotes[footnote_id]
+            attr_id = escape_attr(footnote_id)
+            out.append(f'<li id="fn-{attr_id}">')
+            self._render_into(footnote_node.children, out)
+            out.append(f' <a href="#fnref-{attr_id}" class="kiro-footnote-backref">↩</a></li>\n')
+        out.append(_FOOTNOTES_CLOSE)
 
     def _generate_css(self, styles: dict) -> str:
         css_parts = []
@@ -88,258 +216,145 @@ class KiroRenderer:
                 pass 
             
             if rules:
-                css_parts.append(f"{selector} {{\n" + "\n".join(rules) + "\n}}")
-        return "\n".join(css_parts)
-
-    def _render_node(self, node: Node) -> str:
-        """Dispatches rendering based on node type."""
-        if isinstance(node, DocumentNode):
-            # DocumentNode is handled by the render method itself, not recursively here
-            return ""
-        elif isinstance(node, ParagraphNode):
-            return self._render_paragraph(node)
-        elif isinstance(node, HeadingNode):
-            return self._render_heading(node)
-        elif isinstance(node, HorizontalRuleNode):
-            return self._render_horizontal_rule(node)
-        elif isinstance(node, TextNode):
-            return self._render_text(node)
-        elif isinstance(node, CodeBlockNode):
-            return self._render_code_block(node)
-        elif isinstance(node, QuoteNode):
-            return self._render_quote_block(node)
-        elif isinstance(node, ListItemNode):
-            return self._render_list_item(node)
-        elif isinstance(node, OrderedListItemNode):
-            return self._render_ordered_list_item(node)
-        elif isinstance(node, ToggleNode):
-            return self._render_toggle_block(node)
-        elif isinstance(node, FootnoteDefinitionNode):
-            # Footnote definitions are rendered at the end of the document
-            return ""
-        elif isinstance(node, StyleBlockNode):
-            # Style blocks are handled by the parser and _generate_css method
-            return ""
-        elif isinstance(node, BoldNode):
-            return self._render_bold(node)
-        elif isinstance(node, EmphasisNode):
-            return self._render_emphasis(node)
-        elif isinstance(node, StrikethroughNode):
-            return self._render_strikethrough(node)
-        elif isinstance(node, InlineCodeNode):
-            return self._render_inline_code(node)
-        elif isinstance(node, FootnoteRefNode):
-            return self._render_footnote_ref(node)
-        elif isinstance(node, StyleSpanNode):
-            return self._render_style_span(node)
-        elif isinstance(node, ImageNode):
-            return self._render_image(node)
-        elif isinstance(node, LinkNode):
-            return self._render_link(node)
-        elif isinstance(node, MacroNode):
-            return self._render_macro(node)
-        else:
-            # This should not happen if all node types are handled
-            raise ValueError(f"Unknown node type: {type(node)}")
-
-    def _render_children(self, children: List[Node]) -> str:
-        """Helper to render a list of child nodes."""
-        return "".join(self._render_node(child) for child in children)
-
-    def _render_paragraph(self, node: ParagraphNode) -> str:
-        return f"<p>{self._render_children(node.children)}</p>"
-
-    def _render_heading(self, node: HeadingNode) -> str:
-        return f"<h{node.level}>{self._render_children(node.children)}</h{node.level}>"
-
-    def _render_horizontal_rule(self, node: HorizontalRuleNode) -> str:
-        return "<hr>"
-
-    def _render_text(self, node: TextNode) -> str:
-        # Basic HTML escaping for text content
-        return node.text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+                css_parts.append(f"{selector} {{\n")
+                css_parts.append("\n".join(rules))
+                css_parts.append("\n}\n")
+        return "".join(css_parts)
+
+    def _render_into(self, nodes: Iterable[Node], out: List[str]):
+        """Renders a list of nodes into out, without recursion.
+
+        This walks the tree directly, emitting the same markup as
+        _render_flat. The stack holds the nodes still to be rendered, next
+        one last, and the already rendered closing (or between) markup of
+        open containers as _Markup.
+        """
+        specs = self._specs
+        append = out.append
+        stack: List[Any] = list(reversed(nodes))
+        while stack:
+            item = stack.pop()
+            if type(item) is _Markup:
+                append(item)
+                continue
+            spec = specs.get(type(item))
+            if spec is None:
+                # This should not happen if all node types are handled
+                raise ValueError(f"Unknown node type: {type(item)}")
+            emit, container = spec
+            append(emit if type(emit) is str else emit(item))
+            if container is not None:
+                fields, emit, between = container
+                stack.append(emit if type(emit) is _Markup else _Markup(emit(item)))
+                stack.extend(reversed(getattr(item, fields[-1])))
+                if len(fields) > 1:
+                    for name in fields[-2::-1]:
+                        stack.append(between if type(between) is _Markup else _Markup(between(item)))
+                        stack.extend(reversed(getattr(item, name)))
+
+    def _render_flat(self, flat: FlatNodes, out: List[str]):
+        """Renders flattened nodes into out.
+
+        This is a single pass over the events, with no recursion or stack:
+        each event appends its fixed markup, or the string its handler
+        returns for the node.
+        """
+        # Appending is amortized and measured faster than filling a
+        # preallocated list by index, though there is one fragment per event.
+        emitters = self._emitters
+        append = out.append
+        for code, node in zip(flat.codes, flat.nodes):
+            emit = emitters[code]
+            append(emit if type(emit) is str else emit(node))
+
+    def compile_flat(self, flat: FlatNodes) -> Callable[[List[Node]], Tuple[str, ...]]:
+        """Generates a render function specialized to the structure of flat.
+
+        The function takes flat.nodes and returns the HTML fragments that
+        _render_flat would append, with no per-event dispatch: fixed markup
+        is inlined as constants, merged where consecutive, and only handlers
+        are called. It is cached by the event codes, so it applies to any
+        document with the same structure, and render() uses it from then on.
+
+        Compiling costs much more than a flat render and saves a little on
+        each one, so it only pays off for a document that is rendered many
+        times, such as a live preview.
+        """
+        key = tuple(flat.codes)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self._compiled.move_to_end(key)
+            return compiled
+
+        emitters = self._emitters
+        namespace = {}
+        parts = []
+        pending = [] # Fixed markup not yet added to parts
+        for index, code in enumerate(key):
+            emit = emitters[code]
+            if type(emit) is str:
+                if emit:
+                    pending.append(emit)
+                continue
+            if pending:
+                parts.append(repr("".join(pending)))
+                pending.clear()
+            name = f"emit_{code}"
+            namespace[name] = emit
+            parts.append(f"{name}(nodes[{index}])")
+        if pending:
+            parts.append(repr("".join(pending)))
+        source = "def render(nodes):\n    return (\n" + "".join(f"        {part},\n" for part in parts) + "    )\n"
+        exec(compile(source, "<kiro compiled renderer>", "exec"), namespace)
+        compiled = namespace["render"]
+
+        self._compiled[key] = compiled
+        if len(self._compiled) > _COMPILED_CACHE_SIZE:
+            self._compiled.popitem(last=False)
+        return compiled
+
+    def _render_heading_open(self, node: HeadingNode) -> str:
+        level = node.level
+        # The parser accepts any number of '#'
+        return _H_OPEN[level] if level < len(_H_OPEN) else f"<h{level}>"
+
+    def _render_heading_close(self, node: HeadingNode) -> str:
+        level = node.level
+        return _H_CLOSE[level] if level < len(_H_CLOSE) else f"</h{level}>"
 
     def _render_code_block(self, node: CodeBlockNode) -> str:
-        lang_attr = f' class=\"language-{node.language}\"' if node.language else ""
-        # Basic HTML escaping for code content
-        escaped_content = node.content.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        return f'<pre><code{lang_attr}>{escaped_content}</code></pre>'
-
-    def _render_quote_block(self, node: QuoteNode) -> str:
-        return f"<blockquote>{self._render_children(node.children)}</blockquote>"
-
-    def _render_list_item(self, node: ListItemNode) -> str:
-        # This is a simplified rendering for now, as full list parsing is complex.
-        # It assumes a flat list structure.
-        return f"<li>{self._render_children(node.children)}</li>"
+        code_open = f'<pre><code class="language-{escape_attr(node.language)}">' if node.language else _PRE_OPEN
+        # Basic HTML escaping for code content. Every event emits a single
+        # fragment, so the content is formatted in with its tags.
+        return f"{code_open}{escape_html(node.content)}{_PRE_CLOSE}"
 
     def _render_ordered_list_item(self, node: OrderedListItemNode) -> str:
         # This is a simplified rendering for now.
-        return f"<li class=\"kiro-report-list-item\">{node.prefix} {self._render_children(node.children)}</li>"
-
-    def _render_toggle_block(self, node: ToggleNode) -> str:
-        summary_html = self._render_children(node.summary)
-        content_html = self._render_children(node.content)
-        return f"<details><summary>{summary_html}</summary><div>{content_html}</div></details>"
-
-    def _render_bold(self, node: BoldNode) -> str:
-        return f"<strong>{self._render_children(node.children)}</strong>"
-
-    def _render_emphasis(self, node: EmphasisNode) -> str:
-        return f"<em>{self._render_children(node.children)}</em>"
-
-    def _render_strikethrough(self, node: StrikethroughNode) -> str:
-        return f"<s>{self._render_children(node.children)}</s>"
-
-    def _render_inline_code(self, node: InlineCodeNode) -> str:
-        # Basic HTML escaping for code content
-        escaped_text = node.text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        return f"<code>{escaped_text}</code>"
-
-    def _render_footnote_ref(self, node: FootnoteRefNode) -> str:
-        return f'<sup><a href=\"#fn-{node.id}\" id=\"fnref-{node.id}\" class=\"kiro-footnote-ref\">{node.id}</a></sup>'
-
-    def _render_style_span(self, node: StyleSpanNode) -> str:
-        return f'<span class=\"kiro-{node.style_name}\">{self._render_children(node.children)}</span>'
-
-    def _render_image(self, node: ImageNode) -> str:
-        alt_attr = f' alt=\"{node.alt}\"' if node.alt else ''
-        figcaption = f'<figcaption>{node.alt}</figcaption>' if node.alt else ''
-        return f'<figure><img src=\"{node.src}\"{alt_attr}>{figcaption}</figure>'
-
-    def _render_link(self, node: LinkNode) -> str:
-        text = node.text if node.text else node.href
-        return f'<a href=\"{node.href}\" class=\"kiro-link\">{text}</a>'
-
-    def _render_macro(self, node: MacroNode) -> str:
-        # This is a placeholder for actual macro rendering logic.
-        # For now, it will render a simple div with macro info.
-        # In a real scenario, this would involve specific logic for each macro type (e.g., YouTube embed).
-        args_str = ", ".join(node.args)
-        return f'<div class=\"kiro-macro kiro-macro-{node.name}\">Macro: {node.name}({args_str})</div>'
-
-    def _render_node(self, node: Node) -> str:
-        """Dispatches rendering based on node type."""
-        if isinstance(node, DocumentNode):
-            return self.render(node)
-        elif isinstance(node, ParagraphNode):
-            return self._render_paragraph(node)
-        elif isinstance(node, HeadingNode):
-            return self._render_heading(node)
-        elif isinstance(node, HorizontalRuleNode):
-            return self._render_horizontal_rule(node)
-        elif isinstance(node, TextNode):
-            return self._render_text(node)
-        elif isinstance(node, CodeBlockNode):
-            return self._render_code_block(node)
-        elif isinstance(node, QuoteNode):
-            return self._render_quote_block(node)
-        elif isinstance(node, ListItemNode):
-            return self._render_list_item(node)
-        elif isinstance(node, OrderedListItemNode):
-            return self._render_ordered_list_item(node)
-        elif isinstance(node, ToggleNode):
-            return self._render_toggle_block(node)
-        elif isinstance(node, FootnoteDefinitionNode):
-            # Footnote definitions are rendered at the end of the document
-            return ""
-        elif isinstance(node, StyleBlockNode):
-            # Style blocks are handled at the document level
-            return ""
-        elif isinstance(node, BoldNode):
-            return self._render_bold(node)
-        elif isinstance(node, EmphasisNode):
-            return self._render_emphasis(node)
-        elif isinstance(node, StrikethroughNode):
-            return self._render_strikethrough(node)
-        elif isinstance(node, InlineCodeNode):
-            return self._render_inline_code(node)
-        elif isinstance(node, FootnoteRefNode):
-            return self._render_footnote_ref(node)
-        elif isinstance(node, StyleSpanNode):
-            return self._render_style_span(node)
-        elif isinstance(node, ImageNode):
-            return self._render_image(node)
-        elif isinstance(node, LinkNode):
-            return self._render_link(node)
-        elif isinstance(node, MacroNode):
-            return self._render_macro(node)
-        else:
-            # This should not happen if all node types are handled
-            raise ValueError(f"Unknown node type: {type(node)}")
-
-    def _render_children(self, children: List[Node]) -> str:
-        """Helper to render a list of child nodes."""
-        return "".join(self._render_node(child) for child in children)
-
-    def _render_paragraph(self, node: ParagraphNode) -> str:
-        return f"<p>{self._render_children(node.children)}</p>"
-
-    def _render_heading(self, node: HeadingNode) -> str:
-        return f"<h{node.level}>{self._render_children(node.children)}</h{node.level}>"
-
-    def _render_horizontal_rule(self, node: HorizontalRuleNode) -> str:
-        return "<hr>"
-
-    def _render_text(self, node: TextNode) -> str:
-        # Basic HTML escaping for text content
-        return node.text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-
-    def _render_code_block(self, node: CodeBlockNode) -> str:
-        lang_attr = f' class="language-{node.language}"' if node.language else ""
-        # Basic HTML escaping for code content
-        escaped_content = node.content.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        return f'<pre><code{lang_attr}>{escaped_content}</code></pre>'
-
-    def _render_quote_block(self, node: QuoteNode) -> str:
-        return f"<blockquote>{self._render_children(node.children)}</blockquote>"
-
-    def _render_list_item(self, node: ListItemNode) -> str:
-        # This is a simplified rendering for now, as full list parsing is complex.
-        # It assumes a flat list structure.
-        return f"<li>{self._render_children(node.children)}</li>"
-
-    def _render_ordered_list_item(self, node: OrderedListItemNode) -> str:
-        # This is a simplified rendering for now.
-        return f"<li class=\"kiro-report-list-item\">{node.prefix} {self._render_children(node.children)}</li>"
-
-    def _render_toggle_block(self, node: ToggleNode) -> str:
-        summary_html = self._render_children(node.summary)
-        content_html = self._render_children(node.content)
-        return f"<details><summary>{summary_html}</summary><div>{content_html}</div></details>"
-
-    def _render_bold(self, node: BoldNode) -> str:
-        return f"<strong>{self._render_children(node.children)}</strong>"
-
-    def _render_emphasis(self, node: EmphasisNode) -> str:
-        return f"<em>{self._render_children(node.children)}</em>"
-
-    def _render_strikethrough(self, node: StrikethroughNode) -> str:
-        return f"<s>{self._render_children(node.children)}</s>"
+        return f'<li class="kiro-report-list-item">{node.prefix} '
 
     def _render_inline_code(self, node: InlineCodeNode) -> str:
         # Basic HTML escaping for code content
-        escaped_text = node.text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        escaped_text = escape_html(node.text)
         return f"<code>{escaped_text}</code>"
 
     def _render_footnote_ref(self, node: FootnoteRefNode) -> str:
-        return f'<sup><a href="#fn-{node.id}" id="fnref-{node.id}" class="kiro-footnote-ref">{node.id}</a></sup>'
+        footnote_id = escape_attr(node.id)
+        return f'<sup><a href="#fn-{footnote_id}" id="fnref-{footnote_id}" class="kiro-footnote-ref">{footnote_id}</a></sup>'
 
     def _render_style_span(self, node: StyleSpanNode) -> str:
-        return f'<span class="kiro-{node.style_name}">{self._render_children(node.children)}</span>'
+        return f'<span class="kiro-{node.style_name}">'
 
     def _render_image(self, node: ImageNode) -> str:
-        alt_attr = f' alt="{node.alt}"' if node.alt else ''
-        figcaption = f'<figcaption>{node.alt}</figcaption>' if node.alt else ''
-        return f'<figure><img src="{node.src}"{alt_attr}>{figcaption}</figure>'
+        alt_attr = f' alt="{escape_attr(node.alt)}"' if node.alt else ''
+        figcaption = f'<figcaption>{escape_html(node.alt)}</figcaption>' if node.alt else ''
+        return f'<figure><img src="{escape_attr(node.src)}"{alt_attr}>{figcaption}</figure>'
 
     def _render_link(self, node: LinkNode) -> str:
         text = node.text if node.text else node.href
-        return f'<a href="{node.href}" class="kiro-link">{text}</a>'
+        return f'<a href="{escape_attr(node.href)}" class="kiro-link">{escape_html(text)}</a>'
 
     def _render_macro(self, node: MacroNode) -> str:
         # This is a placeholder for actual macro rendering logic.
         # For now, it will render a simple div with macro info.
         # In a real scenario, this would involve specific logic for each macro type (e.g., YouTube embed).
-        args_str = ", ".join(node.args)
-        return f'<div class="kiro-macro kiro-macro-{node.name}">Macro: {node.name}({args_str})</div>'
\ No newline at end of file
+        return f'<div class="kiro-macro kiro-macro-{node.name}">Macro: {node.name}({node.args_html})</div>'
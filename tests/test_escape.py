@@ -0,0 +1,32 @@
+# tests/test_escape.py
+
+import pytest
+from src.kiro_renderer._escaping import escape_html_py
+
+_escape = pytest.importorskip("src.kiro_renderer._escape", reason="the _escape C extension is not built")
+
+# One-, two- and four-byte strings, as CPython stores them
+FILLERS = ["a", "\xe9", "가", "\U0001f4a1"]
+
+def test_escape_html_matches_the_fallback_around_the_16_byte_boundary():
+    for filler in FILLERS:
+        for length in (15, 16, 17, 31, 32, 33, 40):
+            for special in "&<>":
+                for pos in range(length):
+                    text = filler * pos + special + filler * (length - pos - 1)
+                    assert _escape.escape_html(text) == escape_html_py(text)
+                    doubled = text + special + text
+                    assert _escape.escape_html(doubled) == escape_html_py(doubled)
+
+def test_escape_html_mixed_content():
+    for text in ["", "&", "<>&", "a & b < c > d" * 9, "\xe9<" * 20, "가&\U0001f4a1>" * 7]:
+        assert _escape.escape_html(text) == escape_html_py(text)
+
+def test_escape_html_returns_unchanged_text_as_is():
+    for filler in FILLERS:
+        text = filler * 37
+        assert _escape.escape_html(text) is text
+
+def test_escape_html_rejects_non_str():
+    with pytest.raises(TypeError):
+        _escape.escape_html(b"<b>")
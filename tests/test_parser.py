@@ -1,9 +1,10 @@
 # tests/test_parser.py
 
 import pytest
+import time
 from pathlib import Path
-from src.kiro_renderer.parser import KiroParser
-from src.kiro_renderer.nodes import DocumentNode, HeadingNode, ParagraphNode, HorizontalRuleNode, TextNode
+from src.kiro_renderer.parser import KiroParser, _parse_inlines
+from src.kiro_renderer.nodes import DocumentNode, HeadingNode, ParagraphNode, HorizontalRuleNode, TextNode, BoldNode
 
 # Helper function to create a simple AST string for comparison
 def ast_to_string(node, indent=0):
@@ -188,4 +189,148 @@ def test_example_kiro_parsing(kiro_files_path):
         "  HorizontalRuleNode\n"
     )
 
-    assert ast_to_string(ast) == expected_ast_string
\ No newline at end of file
+    assert ast_to_string(ast) == expected_ast_string
+
+def test_inline_plain_text_is_coalesced():
+    parser = KiroParser("Plain \\*text\\* with a lone * star and [not a span")
+    ast = parser.parse()
+
+    assert ast_to_string(ast) == (
+        "DocumentNode\n"
+        "  ParagraphNode\n"
+        "    TextNode: 'Plain *text* with a lone * star and [not a span'\n"
+    )
+
+def test_inline_nested_spans():
+    parser = KiroParser("*a **b** c* and [note] x ~~y~~ [other] z <> and **unclosed")
+    ast = parser.parse()
+
+    assert ast_to_string(ast) == (
+        "DocumentNode\n"
+        "  ParagraphNode\n"
+        "    EmphasisNode\n"
+        "      TextNode: 'a '\n"
+        "      BoldNode\n"
+        "        TextNode: 'b'\n"
+        "      TextNode: ' c'\n"
+        "    TextNode: ' and '\n"
+        "    StyleSpanNode\n"
+        "      TextNode: ' x '\n"
+        "      StrikethroughNode\n"
+        "        TextNode: 'y'\n"
+        "      TextNode: ' [other] z '\n"
+        "    TextNode: ' and **unclosed'\n"
+    )
+
+def test_cached_inline_nodes_are_not_shared_mutably():
+    first = KiroParser("**shared** text").parse()
+    second = KiroParser("**shared** text").parse()
+    bold = first.children[0].children[0]
+    assert isinstance(bold, BoldNode) and isinstance(bold.children, tuple)
+
+    # Block children are per document; inline children cannot be changed at all
+    first.children[0].children.append(TextNode(text=" more"))
+    with pytest.raises(AttributeError):
+        bold.children.append(TextNode(text="extra"))
+
+    expected = (
+        "DocumentNode\n"
+        "  ParagraphNode\n"
+        "    BoldNode\n"
+        "      TextNode: 'shared'\n"
+        "    TextNode: ' text'\n"
+    )
+    assert ast_to_string(second) == expected
+    assert ast_to_string(KiroParser("**shared** text").parse()) == expected
+
+def test_inline_long_delimiter_runs_stay_linear():
+    def best_time(text):
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            _parse_inlines(text)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    for marker in ("~~", "**", "*"):
+        text = marker * 40000
+        ast = KiroParser(text).parse()
+        assert ast_to_string(ast) == f"DocumentNode\n  ParagraphNode\n    TextNode: '{text}'\n"
+        # Four times the input takes about four times as long, not sixteen
+        assert best_time(marker * 40000) < 8 * best_time(marker * 10000)
+
+def test_inline_double_star_closes_emphasis_when_it_cannot_open():
+    ast = KiroParser("*a** end").parse()
+
+    assert ast_to_string(ast) == (
+        "DocumentNode\n"
+        "  ParagraphNode\n"
+        "    EmphasisNode\n"
+        "      TextNode: 'a'\n"
+        "    TextNode: '* end'\n"
+    )
+
+def test_parse_twice_returns_the_same_document():
+    parser = KiroParser("# Title\n\nText\n")
+    first = parser.parse()
+    second = parser.parse()
+
+    assert second is first
+    assert len(first.children) == 2
+
+def test_blocks_led_by_unicode_whitespace():
+    # The same line is a block start whether or not a paragraph comes before it
+    for text in ("\xa0---", "x\n\xa0---"):
+        assert ast_to_string(KiroParser(text).parse()).endswith("  HorizontalRuleNode\n")
+    for text in ("\u2003```", "x\n\u2003```"):
+        assert ast_to_string(KiroParser(text).parse()).endswith("  CodeBlockNode\n")
+    for text in ("\u3000<style>\n<>", "x\n\u3000<style>\n<>"):
+        assert KiroParser(text).parse().styles == {"main": ""}
+
+def test_line_breaks_are_normalised():
+    expected = (
+        "DocumentNode\n"
+        "  HeadingNode (level=1)\n"
+        "    TextNode: 'A'\n"
+        "  ParagraphNode\n"
+        "    TextNode: 'line one line two'\n"
+    )
+    # The same line boundaries as str.splitlines()
+    for newline in ("\r\n", "\r", "\f", "\u2028"):
+        text = newline.join(["# A", "line one", "line two", ""])
+        assert ast_to_string(KiroParser(text).parse()) == expected
+
+def test_code_block_content_spans_lines():
+    ast = KiroParser("```py\nx = 1\n\n  y\n```\nafter").parse()
+    code = ast.children[0]
+    assert (code.language, code.content) == ("py", "x = 1\n\n  y")
+    assert ast_to_string(ast) == "DocumentNode\n  CodeBlockNode\n  ParagraphNode\n    TextNode: 'after'\n"
+
+def test_unterminated_code_block_runs_to_the_end():
+    ast = KiroParser("```\nnever\nclosed\n").parse()
+    assert [child.content for child in ast.children] == ["never\nclosed"]
+
+def test_multiline_paragraph_ends_at_each_block_start():
+    paragraph = "  ParagraphNode\n    TextNode: 'one two'\n"
+    blocks = {
+        "# H": "  HeadingNode (level=1)\n    TextNode: 'H'\n",
+        "---": "  HorizontalRuleNode\n",
+        "| q": "  QuoteNode\n    ParagraphNode\n      TextNode: 'q'\n",
+        "> t": "  ToggleNode\n",
+        "- l": "  ListItemNode (level=0)\n    ParagraphNode\n      TextNode: 'l'\n",
+        "-1. o": "  ListItemNode (level=0)\n    ParagraphNode\n      TextNode: 'o'\n",
+        "[^1]: f": "  FootnoteDefinitionNode\n    ParagraphNode\n      TextNode: 'f'\n",
+        "@img: a.png": "  ImageNode\n",
+        "@link: x.y": "  LinkNode: 'None'\n",
+        "!m(a)": "  MacroNode\n",
+        "```\nc\n```": "  CodeBlockNode\n",
+        "<style>\n<>": "",
+        "": "",
+    }
+    for block, expected in blocks.items():
+        ast = KiroParser("one\ntwo\n" + block).parse()
+        assert ast_to_string(ast) == "DocumentNode\n" + paragraph + expected, block
+
+def test_paragraph_ends_at_a_blank_line_before_eof():
+    ast = KiroParser("one\ntwo\n\n").parse()
+    assert ast_to_string(ast) == "DocumentNode\n  ParagraphNode\n    TextNode: 'one two'\n"
@@ -0,0 +1,123 @@
+# tests/test_renderer.py
+
+import dataclasses
+import io
+
+import pytest
+
+from src.kiro_renderer.parser import KiroParser
+from src.kiro_renderer.nodes import MacroNode, ParagraphNode, RawHtmlNode, StyleDefinition, TextNode
+from src.kiro_renderer import render, render_to
+from src.kiro_renderer.renderer import KiroRenderer
+
+def render_body(kiro_text):
+    ast = KiroParser(kiro_text).parse()
+    html_output, _ = KiroRenderer().render(ast)
+    return html_output.split("<body>\n", 1)[1].rsplit("\n</body>", 1)[0]
+
+def test_attribute_values_are_escaped():
+    assert render_body('@img: a"b.png (say "hi" & <go>)\n') == (
+        '<figure><img src="a&quot;b.png" alt="say &quot;hi&quot; &amp; &lt;go&gt;">'
+        '<figcaption>say "hi" &amp; &lt;go&gt;</figcaption></figure>'
+    )
+    assert render_body('@link: https://x.y/?a=1&b="2"\n') == (
+        '<a href="https://x.y/?a=1&amp;b=&quot;2&quot;" class="kiro-link">https://x.y/?a=1&amp;b="2"</a>'
+    )
+
+def test_css_rules_are_closed_once():
+    ast = KiroParser("").parse()
+    ast.styles = {
+        "global": StyleDefinition(name="global", properties={"font": "Pretendard"}, is_global=True),
+        "note": StyleDefinition(name="note", properties={"color": "#444"}),
+    }
+    _, css_output = KiroRenderer().render(ast)
+    assert css_output == ":root {\n  font-family: 'Pretendard';\n}\n.kiro-note {\n  color: #444;\n}\n"
+
+def test_footnotes_sort_numeric_ids_before_named_ids():
+    body = render_body("[^b]: bee\n[^10]: ten\n[^2]: two\n")
+    footnotes = body.split("<ol>\n", 1)[1]
+    assert [item.split('"', 2)[1] for item in footnotes.split("<li id=")[1:]] == ["fn-2", "fn-10", "fn-b"]
+
+def test_flat_render_matches_tree_render():
+    ast = KiroParser("# **Title** `x`\n\n> quote\n- item\n@img: a.png (cap)\n[^1]: note\n").parse()
+    assert KiroRenderer().render(ast, ast.flatten()) == KiroRenderer().render(ast)
+
+def test_compiled_render_matches_flat_render():
+    ast = KiroParser("# **Title**\n\n+ summary\n  content\n+\n- a & b\n---\n").parse()
+    renderer = KiroRenderer()
+    expected = renderer.render(ast, ast.flatten())
+    renderer.compile_flat(ast.flatten())
+    assert renderer.render(ast, ast.flatten()) == expected
+
+def test_str_children_are_rejected_by_both_paths():
+    ast = KiroParser("").parse()
+    ast.children = [ParagraphNode(children=("<script>x</script>",))]
+    with pytest.raises(ValueError, match="Unknown node type"):
+        KiroRenderer().render(ast)
+    with pytest.raises(ValueError, match="Unknown node type"):
+        KiroRenderer().render(ast, ast.flatten())
+
+def test_macro_arguments_are_escaped():
+    assert render_body("!embed(a<b, c&d)\n") == (
+        '<div class="kiro-macro kiro-macro-embed">Macro: embed(a&lt;b, c&amp;d)</div>'
+    )
+    ast = KiroParser("").parse()
+    macro = MacroNode(name="embed", args=("<x>",))
+    ast.children = [macro]
+    html_output, _ = KiroRenderer().render(ast)
+    assert "Macro: embed(&lt;x&gt;)" in html_output
+    # The escaped arguments are computed once, so the node cannot change afterwards
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        macro.args = ("y",)
+    args = ["<x>"]
+    listed = MacroNode(name="embed", args=args)
+    args.append("<y>")
+    assert listed.args == ("<x>",)
+    assert listed.args_html == "&lt;x&gt;"
+    assert hash(listed) == hash(macro)
+
+def test_prerendered_blocks_match_the_ast_path():
+    text = "# Plain & <simple>\n\n## With **bold**\n\nA plain paragraph\nover two lines.\n\n---\n\nA *marked* one.\n"
+    ast_html = KiroRenderer().render(KiroParser(text).parse())
+    prerendered = KiroParser(text, prerender=True).parse()
+    assert any(isinstance(block, RawHtmlNode) for block in prerendered.children)
+    assert KiroRenderer().render(prerendered) == ast_html
+
+def test_render_cache_hits_evicts_and_clears(monkeypatch):
+    import src.kiro_renderer as kiro_renderer
+
+    kiro_renderer.render.cache_clear()
+    monkeypatch.setattr(kiro_renderer, "_RENDER_CACHE_SIZE", 2)
+    first = kiro_renderer.render("# one\n")
+    assert kiro_renderer.render("# one\n") is first
+
+    kiro_renderer.render("# two\n")
+    kiro_renderer.render("# three\n") # Evicts "# one", the least recently used
+    again = kiro_renderer.render("# one\n")
+    assert again == first and again is not first
+
+    kiro_renderer.render.cache_clear()
+    assert kiro_renderer.render("# one\n") is not again
+
+def test_render_accepts_lone_surrogates():
+    html_output, _ = render("para \udcff text")
+    assert "<p>para \udcff text</p>" in html_output
+
+def test_render_to_matches_render():
+    kiro_text = (
+        "# Title with ^[1]\n\nPlain text\n\n## **Bold** heading\n\n---\n"
+        "| quoted *text*\n> summary\n>> content\n- item\n```py\nx = 1 < 2\n```\n"
+        "!embed(a, b)\n[^1]: The note\n"
+    )
+    out = io.StringIO()
+    css_output = render_to(kiro_text, out)
+    assert (out.getvalue(), css_output) == render(kiro_text)
+
+def test_text_nodes_are_escaped_when_built():
+    assert KiroParser("hello").parse().children[0].children[0] == TextNode(text="hello")
+    ast = KiroParser("").parse()
+    ast.children = [ParagraphNode(children=[TextNode(text="<script>")])]
+    html_output, _ = KiroRenderer().render(ast)
+    assert "<p>&lt;script&gt;</p>" in html_output
+    with pytest.raises(TypeError):
+        TextNode(text="safe", html="<script>")